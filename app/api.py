@@ -0,0 +1,225 @@
+# app/api.py
+
+import os
+import json
+import asyncio
+import logging
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from gateway import GatewayError
+from user_profile import UserProfile
+
+# --- Request Schemas ---
+class ProfileIn(BaseModel):
+    age: int = Field(ge=10, le=100)
+    gender: str
+    weight_kg: float = Field(ge=30, le=200)
+    height_cm: float = Field(ge=100, le=250)
+    activity_level: str
+    goal: str
+    region: str
+    diet_preference: str
+    allergies: List[str] = []
+    language: str = "English"
+
+class ChatRequest(BaseModel):
+    user_id: str
+    request: str = Field(min_length=1)
+
+class TranslateRequest(BaseModel):
+    text: str
+    target_language: str
+
+# --- Backends ---
+class Backend:
+    """The blocking services the API fronts. Built once per worker process and shared by all requests."""
+    def __init__(self, planner, db, translate):
+        self.planner = planner
+        self.db = db
+        self.translate = translate
+
+def live_backend() -> Backend:
+    # Imported here so the fake backend works without API keys or a database.
+    from planner import MealPlanner
+    from database import db_instance
+    from tools import translate_text
+    return Backend(
+        MealPlanner(),
+        db_instance,
+        lambda text, language: translate_text.invoke({"text_to_translate": text, "target_language": language})
+    )
+
+def fake_backend() -> Backend:
+    from fakes import FakePlanner, FakeDatabase, FakeTranslator, SAMPLE_PROFILE
+    return Backend(FakePlanner(), FakeDatabase(default_profile=SAMPLE_PROFILE), FakeTranslator())
+
+class BlockingPool:
+    """
+    Runs blocking LangChain / PyMongo calls off the event loop on a bounded
+    thread pool. At most `max_workers + max_queue` calls may be pending; callers
+    beyond that wait up to `queue_timeout` seconds and then get a 503.
+    """
+    def __init__(self, max_workers: int, max_queue: int, queue_timeout: float):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+        self._queue_timeout = queue_timeout
+
+    async def run(self, fn, *args):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Server is busy, please retry.", headers={"Retry-After": "5"})
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# --- Helpers ---
+def _load_profile(backend: Backend, user_id: str) -> UserProfile:
+    data = backend.db.get_user_profile(user_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    profile = UserProfile.from_dict(data)
+    if not profile.is_complete():
+        raise HTTPException(status_code=409, detail="Profile is incomplete.")
+    backend.db.touch_last_seen(user_id)
+    return profile
+
+def _plan_texts(plan_data: dict) -> dict:
+    """The user-facing strings of a plan, keyed by their path in the plan document."""
+    texts = {"greeting": plan_data.get('greeting', ''), "summary": plan_data.get('summary', '')}
+    for i, item in enumerate(plan_data.get("plan", [])):
+        texts[f"plan.{i}.justification"] = item.get('justification', '')
+    return {path: text for path, text in texts.items() if text}
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+# --- Application ---
+def create_app(backend_factory=None) -> FastAPI:
+    if backend_factory is None:
+        backend_factory = fake_backend if os.getenv("SWASTH_FAKE_BACKENDS") == "1" else live_backend
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Models, clients and caches are loaded once per worker process, not per request.
+        app.state.backend = backend_factory()
+        app.state.pool = BlockingPool(
+            max_workers=int(os.getenv("API_MAX_WORKERS", 8)),
+            max_queue=int(os.getenv("API_MAX_QUEUE", 32)),
+            queue_timeout=float(os.getenv("API_QUEUE_TIMEOUT", 10)),
+        )
+        yield
+        app.state.pool.shutdown()
+
+    app = FastAPI(title="Swasth AI", lifespan=lifespan)
+
+    @app.exception_handler(GatewayError)
+    async def gateway_error_handler(request: Request, exc: GatewayError):
+        logging.warning(f"Request refused by gateway: {exc}")
+        return JSONResponse(status_code=503, content={"detail": "Upstream provider is busy, please retry."}, headers={"Retry-After": "30"})
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    # --- Profile CRUD ---
+    @app.get("/profiles/{user_id}")
+    async def get_profile(user_id: str, request: Request):
+        state = request.app.state
+        data = await state.pool.run(state.backend.db.get_user_profile, user_id)
+        if not data:
+            raise HTTPException(status_code=404, detail="Profile not found.")
+        data.pop('_id', None)
+        return {"user_id": user_id, "profile": data, "summary": UserProfile.from_dict(data).get_summary()}
+
+    @app.put("/profiles/{user_id}")
+    async def put_profile(user_id: str, profile: ProfileIn, request: Request):
+        state = request.app.state
+        await state.pool.run(state.backend.db.save_user_profile, user_id, profile.model_dump())
+        return {"user_id": user_id, "saved": True}
+
+    @app.delete("/profiles/{user_id}")
+    async def delete_profile(user_id: str, request: Request):
+        state = request.app.state
+        if not await state.pool.run(state.backend.db.delete_user_profile, user_id):
+            raise HTTPException(status_code=404, detail="Profile not found.")
+        return {"user_id": user_id, "deleted": True}
+
+    # --- Planner ---
+    @app.post("/chat")
+    async def chat(body: ChatRequest, request: Request):
+        state = request.app.state
+        profile = await state.pool.run(_load_profile, state.backend, body.user_id)
+        return await state.pool.run(state.backend.planner.get_response, body.request, profile)
+
+    @app.post("/chat/stream")
+    async def chat_stream(body: ChatRequest, request: Request):
+        """
+        Streams newline-delimited JSON events: `accepted`, then `response` with
+        the English result, then one `translation` per plan string as soon as it
+        is ready (for non-English users), then `done`.
+        """
+        state = request.app.state
+        profile = await state.pool.run(_load_profile, state.backend, body.user_id)
+
+        async def events():
+            yield _ndjson({"event": "accepted"})
+            try:
+                response = await state.pool.run(state.backend.planner.get_response, body.request, profile)
+            except Exception as e:
+                # The 200 header is already sent, so errors can only be reported in the stream.
+                logging.error(f"Streamed chat failed for '{body.user_id}': {e}")
+                yield _ndjson({"event": "error", "detail": str(e)})
+                return
+            yield _ndjson({"event": "response", **response})
+
+            if response.get("type") == "plan" and profile.language.lower() != 'english':
+                async def translate(path, text):
+                    return path, await state.pool.run(state.backend.translate, text, profile.language)
+                pending = [translate(path, text) for path, text in _plan_texts(response["data"]).items()]
+                for next_done in asyncio.as_completed(pending):
+                    try:
+                        path, text = await next_done
+                    except Exception as e:
+                        logging.error(f"Streamed translation failed for '{body.user_id}': {e}")
+                        yield _ndjson({"event": "error", "detail": str(e)})
+                        continue
+                    yield _ndjson({"event": "translation", "path": path, "text": text})
+            yield _ndjson({"event": "done"})
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    # --- Translation ---
+    @app.post("/translate")
+    async def translate(body: TranslateRequest, request: Request):
+        state = request.app.state
+        text = await state.pool.run(state.backend.translate, body.text, body.target_language)
+        return {"text": text, "target_language": body.target_language}
+
+    return app
+
+
+app = create_app()
+
+if __name__ == "__main__":
+    import uvicorn
+    # Each worker is a separate process with its own models, caches and gateway.
+    # The workers inherit GATEWAY_PROCESSES and split the provider limits between them.
+    workers = int(os.getenv("API_WORKERS", 1))
+    os.environ["GATEWAY_PROCESSES"] = str(workers)
+    uvicorn.run(
+        "api:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", 8000)),
+        workers=workers,
+    )
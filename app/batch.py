@@ -0,0 +1,165 @@
+# app/batch.py
+"""
+Offline batch job that pre-computes today's meal plans.
+
+Most users open the app in the morning and ask for today's plan. This job
+streams every complete, recently seen profile, groups users whose
+plan-relevant attributes match (diet, allergies, region, calorie band),
+generates one plan per group with bounded parallelism and stores it with an
+expiry. MealPlanner.get_response serves these before calling the LLM.
+
+The job runs in its own process with its own client gateway, so it does not
+yield to interactive traffic in the app or API processes. Schedule it before
+the morning peak, and keep --workers and the GEMINI_* limits low enough that
+its calls plus any live traffic stay within the provider quota.
+
+    cd app
+    python batch.py --workers 4 --ttl-hours 18
+"""
+
+import re
+import json
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from user_profile import UserProfile
+
+DAILY_PLAN_REQUEST = "Create a balanced full-day meal plan for today."
+
+# Generic "what should I eat today" chat requests that a precomputed plan can answer.
+# A question ("what's ...") must name the user, today or a meal plan, so that
+# "What's the plan?" in the middle of a conversation is left to the planner.
+_DAILY_PLAN_CHAT_REQUEST = re.compile(
+    r"^\W*(please\W+)?((give|show|get|make|create)\s+me\s+"
+    r"|what(['’]?s|\s+is)\s+(?=my\b|the\s+(meal|food|diet)\b|.*\btoday\b))?"
+    r"(a\s+|my\s+|the\s+)?(today['’]?s\s+)?((meal|food|diet)\s+)?plan"
+    r"(\s+(for\s+)?(today|the\s+day))?(\W+please)?\W*$",
+    re.IGNORECASE
+)
+
+
+def is_daily_plan_request(user_request: str) -> bool:
+    """True if a chat request asks only for today's plan, with nothing specific to the user."""
+    return bool(_DAILY_PLAN_CHAT_REQUEST.match(user_request))
+
+
+def group_profile_summary(profile: UserProfile) -> str:
+    """A profile summary holding only the attributes a plan group shares, so no one user's details leak into it."""
+    summary = (
+        f"**Dietary Preference:** {profile.diet_preference}\n"
+        f"**Preferred Cuisine:** {profile.region}\n\n"
+        f"**Target:** ~{profile.calorie_band()} kcal"
+    )
+    if profile.allergies:
+        summary += f"\n\n**⚠️ Allergies:** {', '.join(sorted(profile.allergies))}"
+    return summary
+
+
+def generate_group_plan(profile: UserProfile) -> dict:
+    """Generates a plan for the group `profile` represents, using the same tool as the chat path."""
+    from tools import create_meal_plan  # Deferred so the runner can be used with other generators.
+    result = json.loads(create_meal_plan.invoke({
+        "user_request": DAILY_PLAN_REQUEST,
+        "profile_summary": group_profile_summary(profile),
+        "allergies": ", ".join(sorted(profile.allergies or [])),
+        "diet_preference": profile.diet_preference,
+    }))
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result
+
+
+class BatchPlanRunner:
+    """
+    Streams profiles from `db`, de-duplicates them into plan groups and
+    generates each group's plan at most once. Generation starts as soon as a
+    new group is seen, on at most `max_workers` threads.
+    """
+    def __init__(self, db, generate_plan=generate_group_plan, max_workers: int = 4,
+                 ttl: timedelta = timedelta(hours=18), force: bool = False):
+        self.db = db
+        self.generate_plan = generate_plan
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.force = force
+        self.stats = {"profiles": 0, "generated": 0, "reused": 0, "failed": 0, "skipped": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _generate(self, group_key: str, profile: UserProfile):
+        if not self.force and self.db.get_precomputed_plan(group_key):
+            self._count("reused")
+            return
+        plan = self.generate_plan(profile)
+        self.db.save_precomputed_plan(group_key, plan, self.ttl)
+        self._count("generated")
+
+    def run(self, active_since: datetime = None) -> dict:
+        started = time.perf_counter()
+        seen = set()
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch") as executor:
+            for doc in self.db.iter_complete_profiles(active_since=active_since):
+                self._count("profiles")
+                try:
+                    profile = UserProfile.from_dict(doc)
+                    group_key = profile.plan_group_key() if profile.daily_calories is not None else None
+                except Exception as e:
+                    # One malformed document must not abort the scan.
+                    logging.warning(f"Skipping unreadable profile '{doc.get('_id')}': {e}")
+                    group_key = None
+                if group_key is None:
+                    self._count("skipped")
+                    continue
+                if group_key in seen:
+                    continue
+                seen.add(group_key)
+                futures[executor.submit(self._generate, group_key, profile)] = group_key
+
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self._count("failed")
+                    logging.error(f"Batch plan generation failed for group '{futures[future]}': {e}")
+
+        elapsed = time.perf_counter() - started
+        report = dict(self.stats, groups=len(seen), elapsed_s=round(elapsed, 2))
+        planned = report["profiles"] - report["skipped"]
+        report["dedup_ratio"] = round(planned / len(seen), 2) if seen else 0.0
+        report["profiles_per_s"] = round(report["profiles"] / elapsed, 1) if elapsed else 0.0
+        report["plans_per_s"] = round(report["generated"] / elapsed, 2) if elapsed else 0.0
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="plans generated in parallel")
+    parser.add_argument("--ttl-hours", type=float, default=18, help="how long a precomputed plan is served")
+    parser.add_argument("--active-days", type=int, default=30, help="only users seen in the app or API this recently; 0 for all")
+    parser.add_argument("--force", action="store_true", help="regenerate groups that already have a fresh plan")
+    args = parser.parse_args()
+
+    from database import db_instance
+    db_instance.ensure_daily_plan_index()
+    active_since = datetime.utcnow() - timedelta(days=args.active_days) if args.active_days else None
+    runner = BatchPlanRunner(db_instance, max_workers=args.workers, ttl=timedelta(hours=args.ttl_hours), force=args.force)
+    report = runner.run(active_since=active_since)
+
+    print(f"Scanned {report['profiles']} profiles ({report['skipped']} skipped) in {report['elapsed_s']}s "
+          f"({report['profiles_per_s']} profiles/s)")
+    print(f"{report['groups']} plan groups: {report['generated']} generated, {report['reused']} still fresh, "
+          f"{report['failed']} failed ({report['plans_per_s']} plans/s)")
+    print(f"Deduplication ratio: {report['dedup_ratio']} users per plan group")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
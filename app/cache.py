@@ -0,0 +1,83 @@
+# app/cache.py
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A small thread-safe LRU cache whose entries expire after `ttl` seconds.
+    `get_or_compute` coalesces concurrent misses for the same key, so a
+    background prefetch and a user click never trigger the same call twice.
+    """
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return self._MISSING
+        value, expires_at = entry
+        if self._clock() >= expires_at:
+            del self._data[key]
+            return self._MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is self._MISSING else value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, self._clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return self._lookup(key) is not self._MISSING
+
+    def get_or_compute(self, key, compute, should_cache=lambda value: True, wait_timeout: float = None):
+        """
+        Returns the cached value for `key`, normally calling `compute()` at most
+        once across threads on a miss. A caller that finds the key already being
+        computed waits at most `wait_timeout` seconds (None: no limit) and then
+        computes it itself, so an urgent caller is never stuck behind a slow,
+        low-priority computation of the same key.
+        """
+        while True:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not self._MISSING:
+                    return value
+                waiter = self._in_flight.get(key)
+                if waiter is None:
+                    waiter = self._in_flight[key] = threading.Event()
+                    break
+            # Someone else is computing this key; wait for them and re-check.
+            if not waiter.wait(wait_timeout):
+                value = compute()
+                if should_cache(value):
+                    self.set(key, value)
+                return value
+
+        try:
+            value = compute()
+            if should_cache(value):
+                self.set(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            waiter.set()
@@ -1,12 +1,27 @@
 # app/database.py
 
 import os
+import re
 from datetime import datetime, timedelta
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 from dotenv import load_dotenv
 
+from cache import TTLCache
+from metrics import record_call
+
 load_dotenv()
 
+class _CommandCounter(monitoring.CommandListener):
+    """Reports every MongoDB command to the rerun measurement in metrics.py."""
+    def started(self, event):
+        record_call("mongo")
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
 class Database:
     """
     Handles all interactions with the MongoDB database for user profiles,
@@ -17,7 +32,7 @@ class Database:
         if not mongo_uri:
             raise ValueError("MONGO_URI not found in environment variables.")
         
-        client = MongoClient(mongo_uri)
+        client = MongoClient(mongo_uri, event_listeners=[_CommandCounter()])
         # Main DB for recipes
         self.recipes_collection = client["swasth_dashboard_db"]["recipes_and_foods"]
         # DB for user-specific data
@@ -25,6 +40,30 @@ class Database:
         self.profiles_collection = user_db["profiles"]
         # self.plans_collection = user_db["saved_plans"]
         # self.favorites_collection = user_db["favorites"]
+        self.daily_plans_collection = user_db["daily_plans"]
+        # Recipe documents are read-only reference data, so they can be cached generously.
+        self._recipe_cache = TTLCache(maxsize=2048, ttl=6 * 3600)
+
+    # --- Recipe Methods ---
+    def get_recipe(self, item_name: str):
+        """
+        Returns the recipe document for an item name, ignoring case and
+        surrounding whitespace, served from cache when possible. Both the item
+        dialog and the chat's get_recipe_details tool read through here.
+        """
+        name = item_name.strip()
+
+        def _find():
+            # Exact match first: it can use the index, and plan items use the stored name.
+            return (
+                self.recipes_collection.find_one({"item_name": name}, {"_id": 0})
+                or self.recipes_collection.find_one(
+                    {"item_name": {"$regex": f"^{re.escape(name)}$", "$options": "i"}},
+                    {"_id": 0}
+                )
+            )
+
+        return self._recipe_cache.get_or_compute(name.lower(), _find, should_cache=lambda doc: doc is not None)
 
     # --- Profile Methods ---
     def get_user_profile(self, user_id: str):
@@ -38,6 +77,13 @@ class Database:
             upsert=True
         )
     
+    def touch_last_seen(self, user_id: str):
+        """Records that the user opened the app or called the API, for the batch job's activity filter."""
+        self.profiles_collection.update_one({"_id": user_id}, {"$set": {"last_seen": datetime.utcnow()}})
+
+    def delete_user_profile(self, user_id: str) -> bool:
+        return self.profiles_collection.delete_one({"_id": user_id}).deleted_count > 0
+
     def check_needs_weight_update(self, user_id: str) -> bool:
         """Checks if it has been more than 15 days since the last weight update."""
         profile = self.get_user_profile(user_id)
@@ -49,6 +95,41 @@ class Database:
             return True
         return False
 
+    def iter_complete_profiles(self, active_since: datetime = None, batch_size: int = 500):
+        """
+        Streams profiles that have every field needed for planning, optionally
+        only those seen (or saved, for profiles predating `last_seen`) since `active_since`.
+        """
+        required = ["age", "gender", "weight_kg", "height_cm", "activity_level", "goal", "region", "diet_preference"]
+        query = {field: {"$ne": None} for field in required}
+        if active_since:
+            query["$or"] = [
+                {"last_seen": {"$gte": active_since}},
+                {"last_weight_update": {"$gte": active_since}},
+            ]
+        return self.profiles_collection.find(query, batch_size=batch_size)
+
+    # --- Precomputed Daily Plan Methods ---
+    def ensure_daily_plan_index(self):
+        # MongoDB's TTL monitor deletes documents once `expires_at` has passed.
+        self.daily_plans_collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def save_precomputed_plan(self, group_key: str, plan_data: dict, ttl: timedelta):
+        now = datetime.utcnow()
+        self.daily_plans_collection.update_one(
+            {"_id": group_key},
+            {"$set": {"plan": plan_data, "created_at": now, "expires_at": now + ttl}},
+            upsert=True
+        )
+
+    def get_precomputed_plan(self, group_key: str):
+        # The TTL monitor only runs periodically, so check the expiry here as well.
+        doc = self.daily_plans_collection.find_one(
+            {"_id": group_key, "expires_at": {"$gt": datetime.utcnow()}},
+            {"plan": 1}
+        )
+        return doc["plan"] if doc else None
+
     # --- Saved Plan Methods ---
     def save_meal_plan(self, user_id: str, plan_name: str, plan_data: dict):
         self.plans_collection.update_one(
@@ -0,0 +1,135 @@
+# app/fakes.py
+
+import time
+import random
+import threading
+
+
+class FakeProviderError(Exception):
+    """Mimics an HTTP error from a provider client; carries a `status_code` like the real ones."""
+    def __init__(self, status_code: int):
+        super().__init__(f"Fake provider returned HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeProvider:
+    """
+    A local stand-in for Gemini or Tavily used to exercise the gateway without
+    network access. It sleeps for `latency` (+/- `jitter`) seconds, fails a
+    fraction `error_rate` of calls with `error_status`, and otherwise returns
+    `response`. `fail_next(n)` queues a deterministic burst of failures.
+    """
+    def __init__(self, response="ok", latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 429, seed: int = None):
+        self.response = response
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._scripted_failures = []
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def fail_next(self, count: int, status_code: int = None):
+        with self._lock:
+            self._scripted_failures.extend([status_code or self.error_status] * count)
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            status = self._scripted_failures.pop(0) if self._scripted_failures else None
+            if status is None and self._random.random() < self.error_rate:
+                status = self.error_status
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        try:
+            if delay:
+                time.sleep(delay)
+            if status is not None:
+                with self._lock:
+                    self.errors += 1
+                raise FakeProviderError(status)
+            return self.response(*args, **kwargs) if callable(self.response) else self.response
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+# --- Fake Backends for the HTTP API and load tests ---
+SAMPLE_PROFILE = {
+    "age": 30, "gender": "Female", "weight_kg": 62.0, "height_cm": 165.0,
+    "activity_level": "Lightly Active (walking 1-3 days/wk)", "goal": "Maintain Weight",
+    "region": "North Indian", "diet_preference": "Vegetarian", "allergies": [], "language": "Hindi",
+}
+
+_FAKE_PLAN = {
+    "greeting": "Here is a tasty plan for today! 🍳",
+    "plan": [
+        {"meal_time": "Breakfast", "meal_name": "Poha", "justification": "Light and full of fibre to start your day."},
+        {"meal_time": "Lunch", "meal_name": "Dal Tadka", "justification": "Protein-rich lentils keep you full."},
+        {"meal_time": "Dinner", "meal_name": "Vegetable Khichdi", "justification": "Easy to digest for a calm night."},
+    ],
+    "summary": "A balanced day of simple, wholesome meals.",
+}
+
+
+class FakePlanner:
+    """Answers like MealPlanner.get_response, with the latency and errors of a FakeProvider."""
+    def __init__(self, provider: FakeProvider = None):
+        self.provider = provider or FakeProvider(latency=0.5, jitter=0.2)
+
+    def get_response(self, user_request: str, user_profile) -> dict:
+        self.provider()
+        if "plan" in user_request.lower():
+            return {"type": "plan", "data": {**_FAKE_PLAN, "plan": [dict(item) for item in _FAKE_PLAN["plan"]]}}
+        return {"type": "message", "data": f"(fake) You said: {user_request}"}
+
+
+class FakeDatabase:
+    """
+    An in-memory stand-in for database.Database covering the methods the API
+    uses. Each process has its own copy, so with several API workers a user
+    saved in one is unknown to the others; `default_profile` is returned for
+    unknown users to keep multi-worker load tests meaningful.
+    """
+    def __init__(self, default_profile: dict = None):
+        self.default_profile = default_profile
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def get_user_profile(self, user_id: str):
+        with self._lock:
+            profile = self._profiles.get(user_id)
+        if profile:
+            return dict(profile)
+        return {"_id": user_id, **self.default_profile} if self.default_profile else None
+
+    def save_user_profile(self, user_id: str, profile_data: dict):
+        with self._lock:
+            self._profiles.setdefault(user_id, {"_id": user_id}).update(profile_data)
+
+    def touch_last_seen(self, user_id: str):
+        with self._lock:
+            if user_id in self._profiles:
+                self._profiles[user_id]["last_seen"] = time.time()
+
+    def delete_user_profile(self, user_id: str) -> bool:
+        with self._lock:
+            return self._profiles.pop(user_id, None) is not None
+
+
+class FakeTranslator:
+    """Tags text with the target language instead of calling an LLM."""
+    def __init__(self, provider: FakeProvider = None):
+        self.provider = provider or FakeProvider(latency=0.1, jitter=0.05)
+
+    def __call__(self, text: str, target_language: str) -> str:
+        if target_language.lower() == 'english':
+            return text
+        self.provider()
+        return f"[{target_language}] {text}"
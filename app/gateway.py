@@ -0,0 +1,356 @@
+# app/gateway.py
+
+import os
+import re
+import time
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from enum import IntEnum
+
+from metrics import record_call
+
+
+class Priority(IntEnum):
+    """Lanes for outbound calls. Lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class GatewayError(Exception):
+    """Raised by the gateway itself (not the provider) when a call is refused."""
+    def __init__(self, provider: str, message: str):
+        super().__init__(f"[{provider}] {message}")
+        self.provider = provider
+
+
+class CircuitOpenError(GatewayError):
+    """The provider has failed repeatedly and calls are being fast-failed."""
+
+
+class GatewayBusyError(GatewayError):
+    """No rate-limit token or concurrency slot became free in time."""
+
+
+_current_priority = contextvars.ContextVar("gateway_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    """The lane gateway calls made from the current context run in."""
+    return _current_priority.get()
+
+
+@contextmanager
+def priority_lane(priority: Priority):
+    """Runs every gateway call made inside the block in the given lane."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+# --- Building Blocks ---
+class TokenBucket:
+    """
+    A thread-safe token bucket. `rate` tokens are added per second up to
+    `capacity`. Callers may ask to leave a `reserve` of tokens untouched so
+    that lower-priority traffic cannot drain the bucket completely.
+    """
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, reserve: float = 0.0) -> float:
+        """Takes a token if one is available. Returns 0 on success, otherwise the seconds to wait."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1 + reserve:
+                self._tokens -= 1
+                return 0.0
+            return (1 + reserve - self._tokens) / self.rate
+
+    def acquire(self, timeout: float, reserve: float = 0.0) -> bool:
+        deadline = self._clock() + timeout
+        while True:
+            wait = self.try_acquire(reserve)
+            if wait == 0.0:
+                return True
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                return False
+            time.sleep(min(wait, remaining))
+
+
+class PrioritySemaphore:
+    """
+    A bounded semaphore that hands free slots to the highest-priority waiter
+    first. A caller only proceeds when nobody in a more urgent lane is waiting.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._waiting = {p: 0 for p in Priority}
+        self._cond = threading.Condition()
+
+    def _can_enter(self, priority: Priority) -> bool:
+        if self._active >= self.limit:
+            return False
+        return not any(self._waiting[p] for p in Priority if p < priority)
+
+    def acquire(self, priority: Priority, timeout: float) -> bool:
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                acquired = self._cond.wait_for(lambda: self._can_enter(priority), timeout)
+                if acquired:
+                    self._active += 1
+                return acquired
+            finally:
+                self._waiting[priority] -= 1
+                # A lane that stops waiting may unblock callers in slower lanes.
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker. After `failure_threshold`
+    consecutive retryable failures the circuit opens and calls fail fast for
+    `reset_timeout` seconds, after which a single trial call is let through.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """
+        Returns the state the call is admitted under (CLOSED, or HALF_OPEN for
+        the single trial call), or None if it must fail fast. The holder of a
+        trial must settle it with record_success, record_failure or abort_trial.
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return state
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return state
+            return None
+
+    def abort_trial(self):
+        """Gives back a trial that never reached the provider, so another caller can make it."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self, trial: bool = False):
+        """
+        Only the half-open trial may close an open circuit. A late success from a
+        call admitted before the circuit opened just resets the failure streak
+        while the circuit is still closed.
+        """
+        with self._lock:
+            if trial or self._opened_at is None:
+                self._failures = 0
+                self._opened_at = None
+            if trial:
+                self._trial_in_flight = False
+
+    def record_failure(self, trial: bool = False):
+        with self._lock:
+            self._failures += 1
+            if trial or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            if trial:
+                self._trial_in_flight = False
+
+
+# --- Error Classification ---
+# Some client wrappers only keep the provider's message, so throttling is also
+# recognised from the text. Bare numbers are not matched on purpose: "500 kcal"
+# inside a parse error must not look like a server error.
+_THROTTLED_MESSAGE = re.compile(r"\b429\b|resource.?exhausted|rate.?limit|service.?unavailable", re.IGNORECASE)
+
+def _status_code(exc: Exception):
+    """Best-effort extraction of an HTTP status from the various client exceptions we see."""
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+def is_retryable(exc: Exception) -> bool:
+    """True for throttling (429), server errors (5xx) and transport failures."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    return bool(_THROTTLED_MESSAGE.search(str(exc)))
+
+
+# --- The Gateway ---
+class _Provider:
+    def __init__(self, name, rate, burst, max_concurrency, max_retries,
+                 backoff_base, backoff_cap, max_wait, failure_threshold,
+                 reset_timeout, background_reserve):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = PrioritySemaphore(max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_wait = max_wait
+        # Tokens the background lane must leave in the bucket for interactive calls.
+        # Capped so that 1 + reserve still fits in the bucket: with the small bursts
+        # of a per-process share the background lane would otherwise never get a token.
+        self.background_reserve = max(0.0, min(background_reserve * burst, burst - 1))
+        self.stats = {"calls": 0, "successes": 0, "retries": 0, "failures": 0, "rejected": 0}
+        self._stats_lock = threading.Lock()
+
+    def count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+
+class ClientGateway:
+    """
+    A single choke point for outbound calls to external providers. Every call
+    goes through a per-provider token bucket, a priority-aware concurrency cap
+    and a circuit breaker, and throttling / server errors are retried with
+    jittered exponential backoff.
+    """
+    def __init__(self):
+        self._providers = {}
+        self._sleep = time.sleep
+
+    def register(self, name: str, rate: float, burst: float, max_concurrency: int,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_cap: float = 8.0,
+                 max_wait: float = 30.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, background_reserve: float = 0.25):
+        self._providers[name] = _Provider(
+            name, rate, burst, max_concurrency, max_retries, backoff_base, backoff_cap,
+            max_wait, failure_threshold, reset_timeout, background_reserve
+        )
+
+    def call(self, provider: str, fn, *args, priority: Priority = None, **kwargs):
+        """Invokes `fn(*args, **kwargs)` under the limits registered for `provider`."""
+        p = self._providers[provider]
+        if priority is None:
+            priority = _current_priority.get()
+        reserve = p.background_reserve if priority > Priority.INTERACTIVE else 0.0
+        p.count("calls")
+
+        attempt = 0
+        while True:
+            permit = p.breaker.allow()
+            if permit is None:
+                p.count("rejected")
+                raise CircuitOpenError(provider, "circuit is open, failing fast")
+            try:
+                if not p.bucket.acquire(p.max_wait, reserve):
+                    raise GatewayBusyError(provider, "rate limit wait exceeded")
+                if not p.semaphore.acquire(priority, p.max_wait):
+                    raise GatewayBusyError(provider, "concurrency wait exceeded")
+            except BaseException:
+                # A half-open trial that never reached the provider must not stay claimed.
+                if permit == CircuitBreaker.HALF_OPEN:
+                    p.breaker.abort_trial()
+                p.count("rejected")
+                raise
+            trial = permit == CircuitBreaker.HALF_OPEN
+            record_call(provider)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The request itself was bad: this says nothing about the
+                    # provider's health, so it neither opens nor closes the circuit.
+                    if trial:
+                        p.breaker.abort_trial()
+                    p.count("failures")
+                    raise
+                p.breaker.record_failure(trial)
+                if attempt >= p.max_retries or p.breaker.state == CircuitBreaker.OPEN:
+                    p.count("failures")
+                    raise
+                logging.warning(f"{provider} call failed ({e}); retry {attempt + 1}/{p.max_retries}")
+            else:
+                p.breaker.record_success(trial)
+                p.count("successes")
+                return result
+            finally:
+                p.semaphore.release()
+
+            # Full jitter keeps many sessions from retrying in lockstep.
+            delay = random.uniform(0, min(p.backoff_cap, p.backoff_base * (2 ** attempt)))
+            p.count("retries")
+            attempt += 1
+            self._sleep(delay)
+
+    def stats(self, provider: str) -> dict:
+        p = self._providers[provider]
+        return dict(p.stats, circuit=p.breaker.state, in_flight=p.semaphore.active)
+
+
+# The *_RATE_PER_SEC, *_BURST and *_MAX_CONCURRENCY values are totals for the
+# deployment. When GATEWAY_PROCESSES processes each run their own gateway (e.g.
+# API workers), every process takes an equal share so the sum stays the same.
+_PROCESS_COUNT = max(1, int(os.getenv("GATEWAY_PROCESSES", 1)))
+
+def _limit(name: str, default: float) -> float:
+    return float(os.getenv(name, default)) / _PROCESS_COUNT
+
+def _register_from_env(name: str, prefix: str, rate: float, burst: float, max_concurrency: int):
+    gateway.register(
+        name,
+        rate=_limit(f"{prefix}_RATE_PER_SEC", rate),
+        burst=max(1.0, _limit(f"{prefix}_BURST", burst)),
+        max_concurrency=max(1, int(_limit(f"{prefix}_MAX_CONCURRENCY", max_concurrency))),
+    )
+
+# Create a single, shared gateway for the whole process (all Streamlit sessions).
+gateway = ClientGateway()
+_register_from_env("gemini", "GEMINI", rate=2.0, burst=5, max_concurrency=4)
+_register_from_env("tavily", "TAVILY", rate=1.0, burst=3, max_concurrency=2)
@@ -0,0 +1,116 @@
+# app/load_test.py
+"""
+Load test for the HTTP API (api.py).
+
+Seeds a set of user profiles, then fires chat requests from many concurrent
+clients and reports throughput, latency percentiles and status codes.
+
+    # Against a server you started yourself:
+    python load_test.py --url http://localhost:8000
+
+    # Or let the script start one with fake backends (no API keys or DB needed):
+    python load_test.py --spawn --workers 2 --concurrency 64 --requests 1000
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+from collections import Counter
+
+import httpx
+
+from fakes import SAMPLE_PROFILE
+
+SAMPLE_REQUESTS = ["Give me a meal plan for today", "Hi there!", "Plan my meals please", "What is poha?"]
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _spawn_server(port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, SWASTH_FAKE_BACKENDS="1", API_PORT=str(port), API_WORKERS=str(workers), API_HOST="127.0.0.1")
+    return subprocess.Popen([sys.executable, "api.py"], cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+
+
+async def _wait_until_healthy(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("Server did not become healthy in time.")
+
+
+async def _run(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        await _wait_until_healthy(client)
+
+        user_ids = [f"loadtest-{i}" for i in range(args.users)]
+        await asyncio.gather(*(client.put(f"/profiles/{uid}", json=SAMPLE_PROFILE) for uid in user_ids))
+
+        latencies, statuses = [], Counter()
+        next_request = iter(range(args.requests))
+        path = "/chat/stream" if args.stream else "/chat"
+
+        async def client_loop(worker: int):
+            for n in next_request:
+                body = {"user_id": user_ids[n % len(user_ids)], "request": SAMPLE_REQUESTS[n % len(SAMPLE_REQUESTS)]}
+                started = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(w) for w in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{args.requests} requests to {path} with {args.concurrency} clients in {elapsed:.2f}s")
+    print(f"  throughput: {args.requests / elapsed:.1f} req/s")
+    print("  latency (ms): " + ", ".join(
+        f"p{p}={_percentile(latencies, p) * 1000:.0f}" for p in (50, 90, 95, 99)
+    ))
+    print("  statuses: " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items(), key=str)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="start api.py with fake backends for the run")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes when using --spawn")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--stream", action="store_true", help="use the streaming endpoint")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        port = httpx.URL(args.url).port or 8000
+        server = _spawn_server(port, args.workers)
+    try:
+        asyncio.run(_run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
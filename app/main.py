@@ -16,6 +16,8 @@ from planner import MealPlanner
 from user_profile import UserProfile
 from database import db_instance 
 from tools import translate_text # --- NEW: Import the translation tool ---
+from prefetch import prefetcher
+from metrics import MEASURE_RERUNS, start_recording
 
 
 # --- Page Config (with Dark Theme as default) ---
@@ -50,6 +52,21 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- 0. RERUN MEASUREMENT (only with SWASTH_MEASURE_RERUNS=1) ---
+def begin_measured_run(kind: str):
+    """Starts a new entry in the rerun log; backend calls made until the next run are counted against it."""
+    if not MEASURE_RERUNS:
+        return
+    counts = st.session_state.setdefault("rerun_counts", {"script": 0, "fragment": 0})
+    counts[kind] += 1
+    log = st.session_state.setdefault("rerun_log", [])
+    log.append({"run": sum(counts.values()), "kind": kind, "calls": start_recording()})
+    del log[:-50]
+
+# Fragment bodies also execute inside full script runs; only a fragment-only rerun gets its own entry.
+st.session_state.in_script_run = True
+begin_measured_run("script")
+
 # --- 1. SESSION STATE INITIALIZATION ---
 # All session state variables should be initialized at the very top.
 if 'user_id' not in st.session_state: st.session_state.user_id = str(uuid.uuid4())
@@ -63,6 +80,7 @@ if "messages" not in st.session_state: st.session_state.messages = []
 if "user_profile" not in st.session_state: st.session_state.user_profile = UserProfile()
 if 'profile_loaded' not in st.session_state: st.session_state.profile_loaded = False
 if "last_response" not in st.session_state: st.session_state.last_response = None
+if "plan_view" not in st.session_state: st.session_state.plan_view = None # Translated render model of last_response
 if 'needs_update' not in st.session_state: st.session_state.needs_update = False
 if 'editing_profile' not in st.session_state: st.session_state.editing_profile = False # --- NEW ---
 
@@ -70,63 +88,90 @@ if 'editing_profile' not in st.session_state: st.session_state.editing_profile =
 # All helper functions are defined next. They don't execute until called.
 
 # --- UI RENDERING HELPERS ---
-def render_meal_plan(plan_data):
+def build_plan_view(plan_data, user_language):
+    """Translates everything a plan card shows, once, into a render model that needs no further backend calls."""
+    def t(text):
+        return translate_text.invoke({"text_to_translate": text, "target_language": user_language})
+
+    plan_items = plan_data.get("plan", [])
+    view_details_text = t("View Details 🍲")
+    return {
+        "greeting": t(plan_data.get('greeting', 'Here is your plan! 🍳')),
+        "items": [
+            {
+                "meal_time": item.get('meal_time', ''),
+                "meal_name": item.get('meal_name', '...'),
+                "justification": t(item.get('justification', '')),
+                "view_details": view_details_text,
+                "key": f"view_{item.get('meal_name', i).replace(' ', '_')}",
+            }
+            for i, item in enumerate(plan_items)
+        ],
+        "summary": t(plan_data.get('summary', 'Enjoy your meals!')) if plan_items else "",
+        "save_plan": t("💾 Save This Plan") if plan_items else "",
+        "simple_plan": {item['meal_time']: item['meal_name'] for item in plan_items},
+    }
+
+def get_plan_view(plan_data):
+    """Returns the stored render model for the current plan, building it only when the plan or language changed."""
     user_language = st.session_state.user_profile.language
+    cached = st.session_state.plan_view
+    if cached is None or cached["language"] != user_language:
+        # Warm the detail views in the background; a no-op if this plan is already queued.
+        prefetcher.prefetch_plan(st.session_state.user_id, plan_data)
+        cached = {"language": user_language, "view": build_plan_view(plan_data, user_language)}
+        st.session_state.plan_view = cached
+    return cached["view"]
+
+@st.fragment
+def render_meal_plan(plan_view):
+    # Clicking "View Details" or "Save" reruns only this fragment, not the whole page.
+    if not st.session_state.in_script_run:
+        begin_measured_run("fragment")
+
+    st.markdown(f"#### {plan_view['greeting']}")
     
-    english_greeting = plan_data.get('greeting', 'Here is your plan! 🍳')
-    # translated_greeting = translate_text(english_greeting, user_language)
-    translated_greeting = translate_text.invoke({
-    "text_to_translate": english_greeting, 
-    "target_language": user_language
-})
-    st.markdown(f"#### {translated_greeting}")
-    
-    plan_items = plan_data.get("plan", [])
+    plan_items = plan_view["items"]
     if plan_items:
         cols = st.columns(len(plan_items) if len(plan_items) <= 3 else 3)
         for i, item in enumerate(plan_items):
             with cols[i % 3]:
                 with st.container(border=True):
-                    st.markdown(f"**{item.get('meal_time', '')}**")
-                    st.markdown(f"##### {item.get('meal_name', '...')}")
-                    
-                    justification_en = item.get('justification', '')
-                    # justification_translated = translate_text(justification_en, user_language)
-                    justification_translated = translate_text.invoke({
-                        "text_to_translate": justification_en, 
-                        "target_language": user_language
-                    })
-                    st.markdown(f"<p class='justification-text'>✨ {justification_translated}</p>", unsafe_allow_html=True)
-                    
-                    # view_details_text = translate_text("View Details 🍲", user_language)
-                    view_details_text = translate_text.invoke({
-                        "text_to_translate": "View Details 🍲",
-                        "target_language": user_language
-                    })
-                    if st.button(view_details_text, key=f"view_{item.get('meal_name', i).replace(' ', '_')}"):
-                        show_item_dialog(item.get('meal_name'))
+                    st.markdown(f"**{item['meal_time']}**")
+                    st.markdown(f"##### {item['meal_name']}")
+                    st.markdown(f"<p class='justification-text'>✨ {item['justification']}</p>", unsafe_allow_html=True)
+                    if st.button(item["view_details"], key=item["key"]):
+                        show_item_dialog(item['meal_name'])
         st.divider()
-        
-        summary_en = plan_data.get('summary', 'Enjoy your meals!')
-        # summary_translated = translate_text(summary_en, user_language)
-        summary_translated = translate_text.invoke({
-            "text_to_translate": summary_en,
-            "target_language": user_language
-        })
-
-        st.success(f"**Plan Summary:** {summary_translated}")
-
-        simple_plan = {item['meal_time']: item['meal_name'] for item in plan_items}
-        # save_plan_text = translate_text("💾 Save This Plan", user_language)
-        save_plan_text = translate_text.invoke({
-            "text_to_translate": "💾 Save This Plan",
-            "target_language": user_language
-        })
-        if st.button(save_plan_text, use_container_width=True, type="primary"):
+
+        st.success(f"**Plan Summary:** {plan_view['summary']}")
+
+        if st.button(plan_view["save_plan"], use_container_width=True, type="primary"):
             plan_name = f"Plan - {datetime.now().strftime('%b %d, %Y')}"
-            db_instance.save_meal_plan(st.session_state.user_id, plan_name, simple_plan)
+            db_instance.save_meal_plan(st.session_state.user_id, plan_name, plan_view["simple_plan"])
             st.toast("Plan saved!", icon="✅")
 
+def render_last_response():
+    response_dict = st.session_state.last_response
+    if not response_dict:
+        return
+    if response_dict.get("type") == "plan":
+        render_meal_plan(get_plan_view(response_dict.get("data", {})))
+    elif response_dict.get("type") == "item_details":
+        render_item_details(response_dict.get("data", {}))
+    elif response_dict.get("type") == "web_recipe":
+        render_web_recipe(response_dict.get("data", {}))
+
+def render_rerun_measurements():
+    counts = st.session_state.rerun_counts
+    with st.sidebar.expander("🔬 Rerun Measurements", expanded=True):
+        col1, col2 = st.columns(2)
+        col1.metric("Script Runs", counts["script"])
+        col2.metric("Fragment Runs", counts["fragment"])
+        for entry in reversed(st.session_state.rerun_log[-10:]):
+            calls = ", ".join(f"{name}={count}" for name, count in sorted(entry["calls"].items())) or "no backend calls"
+            st.caption(f"#{entry['run']} {entry['kind']}: {calls}")
+
 def render_item_details(item_data):
     st.subheader(f"✅ From my cookbook: **{item_data.get('item_name')}**")
     with st.container(border=True):
@@ -168,7 +213,7 @@ def show_item_dialog_content(item):
 
 @st.dialog("🍲 Item Details")
 def show_item_dialog(item_name):
-    item = db_instance.recipes_collection.find_one({"item_name": item_name}, {"_id": 0})
+    item = db_instance.get_recipe(item_name)
     if item:
         show_item_dialog_content(item)
     else:
@@ -178,12 +223,8 @@ def show_item_dialog(item_name):
 def load_profile_from_db():
     profile_data = db_instance.get_user_profile(st.session_state.user_id)
     if profile_data:
-        p = st.session_state.user_profile
-        for key, value in profile_data.items():
-            if key != '_id': setattr(p, key, value)
-        if not hasattr(p, 'language') or not p.language:
-            p.language = "English"
-        p.calculate_metrics()
+        st.session_state.user_profile = UserProfile.from_dict(profile_data)
+        db_instance.touch_last_seen(st.session_state.user_id)
         st.session_state.needs_update = db_instance.check_needs_weight_update(st.session_state.user_id)
         return True
     return False
@@ -272,6 +313,7 @@ if not st.session_state.user_profile.is_complete() or st.session_state.editing_p
                 "allergies": allergies, "diet_preference": diet_preference, "language": language
             }
             db_instance.save_user_profile(st.session_state.user_id, profile_data)
+            prefetcher.cancel(st.session_state.user_id)
             st.session_state.editing_profile = False
             st.session_state.profile_loaded = False
             st.toast("Profile saved successfully!", icon="🎉")
@@ -292,14 +334,9 @@ else:
 
     st.title("🥗 Your Daily Food Adventure!")
     
-    if st.session_state.last_response:
-        response_dict = st.session_state.last_response
-        if response_dict.get("type") == "plan":
-            render_meal_plan(response_dict.get("data", {}))
-        elif response_dict.get("type") == "item_details":
-            render_item_details(response_dict.get("data", {}))
-        elif response_dict.get("type") == "web_recipe":
-            render_web_recipe(response_dict.get("data", {}))
+    # The response view is drawn into this slot at the end of the run, so a chat
+    # turn that produces a new response shows it without a second full rerun.
+    response_slot = st.container()
     
     st.markdown("---")
     
@@ -327,9 +364,11 @@ else:
             with st.spinner("Your food buddy is thinking... 🤓"):
                 response_dict = st.session_state.planner.get_response(prompt, st.session_state.user_profile)
                 st.session_state.last_response = response_dict
+                st.session_state.plan_view = None
                 
                 response_type = response_dict.get("type")
                 if response_type == "plan":
+                    prefetcher.prefetch_plan(st.session_state.user_id, response_dict["data"])
                     english_chat_text = response_dict["data"].get("greeting", "I've created a plan for you!")
                 elif response_type == "item_details":
                     english_chat_text = f"You got it! I've pulled up the details for **{response_dict['data'].get('item_name')}**."
@@ -346,4 +385,10 @@ else:
                 
                 st.markdown(chat_text)
                 st.session_state.messages.append({"role": "assistant", "content": chat_text})
-                st.rerun()
\ No newline at end of file
+
+    with response_slot:
+        render_last_response()
+
+if MEASURE_RERUNS:
+    render_rerun_measurements()
+st.session_state.in_script_run = False
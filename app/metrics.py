@@ -0,0 +1,29 @@
+# app/metrics.py
+
+import os
+import contextvars
+from collections import Counter
+
+# Set SWASTH_MEASURE_RERUNS=1 to show per-rerun backend call counts in the Streamlit sidebar.
+MEASURE_RERUNS = os.getenv("SWASTH_MEASURE_RERUNS") == "1"
+
+_recorder = contextvars.ContextVar("call_recorder", default=None)
+
+
+def record_call(backend: str):
+    """Counts one outbound call against the measurement active in this context, if any."""
+    counts = _recorder.get()
+    if counts is not None:
+        counts[backend] += 1
+
+
+def start_recording() -> Counter:
+    """
+    Starts collecting the backend calls made by the current thread (and code it
+    runs synchronously) into a fresh Counter, e.g. {"gemini": 2, "mongo": 1},
+    replacing any previous recording. Work handed to other threads, such as the
+    background prefetcher, is not counted.
+    """
+    counts = Counter()
+    _recorder.set(counts)
+    return counts
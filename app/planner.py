@@ -11,7 +11,10 @@ from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
 
 from user_profile import UserProfile
+from batch import is_daily_plan_request
 from tools import create_meal_plan, get_recipe_details
+from database import db_instance
+from gateway import gateway, GatewayError
 
 class AgentState(TypedDict):
     messages: List[BaseMessage]
@@ -24,7 +27,7 @@ class MealPlanner:
         self.graph = self._build_graph()
 
     def _build_graph(self):
-        llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest", temperature=0.2)
+        llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest", temperature=0.2, max_retries=1)
         tools = [create_meal_plan, get_recipe_details] 
         llm_with_tools = llm.bind_tools(tools)
         
@@ -50,7 +53,7 @@ class MealPlanner:
             ]
             
             messages = [SystemMessage(content=system_prompt)] + contextual_messages
-            response = llm_with_tools.invoke(messages)
+            response = gateway.call("gemini", llm_with_tools.invoke, messages)
             return {"messages": [response]}
 
         tool_node = ToolNode(tools)
@@ -68,11 +71,19 @@ class MealPlanner:
         return workflow.compile()
 
     def get_response(self, user_request: str, user_profile: UserProfile) -> dict:
+        precomputed = self._get_precomputed_plan(user_request, user_profile)
+        if precomputed:
+            return {"type": "plan", "data": precomputed}
+
         config = {"configurable": {"user_profile": user_profile}}
-        final_state = self.graph.invoke(
-            {"messages": [HumanMessage(content=user_request)]},
-            config=config
-        )
+        try:
+            final_state = self.graph.invoke(
+                {"messages": [HumanMessage(content=user_request)]},
+                config=config
+            )
+        except GatewayError as e:
+            logging.warning(f"Agent call refused by gateway: {e}")
+            return {"type": "message", "data": "I'm getting a lot of questions right now! Please try again in a minute."}
         
         last_tool_message = None
         for msg in reversed(final_state["messages"]):
@@ -99,4 +110,14 @@ class MealPlanner:
                     return {"type": "item_details", "data": tool_output.get('db_data', {})}
         
         # If no tool was called, return the conversational response
-        return {"type": "message", "data": final_state["messages"][-1].content}
\ No newline at end of file
+        return {"type": "message", "data": final_state["messages"][-1].content}
+
+    def _get_precomputed_plan(self, user_request: str, user_profile: UserProfile):
+        """Returns today's batch-generated plan for the user's group, if the request is a generic plan request."""
+        if not user_profile.is_complete() or not is_daily_plan_request(user_request):
+            return None
+        try:
+            return db_instance.get_precomputed_plan(user_profile.plan_group_key())
+        except Exception as e:
+            logging.warning(f"Precomputed plan lookup failed, generating instead: {e}")
+            return None
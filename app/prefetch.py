@@ -0,0 +1,104 @@
+# app/prefetch.py
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database import db_instance
+from gateway import Priority, priority_lane
+from tools import search_recipe_web
+
+
+class _PrefetchJob:
+    """The prefetch work queued for one plan of one user."""
+    def __init__(self, key):
+        self.key = key
+        self.cancelled = threading.Event()
+        self.futures = []
+
+    def cancel(self):
+        self.cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+
+class PlanPrefetcher:
+    """
+    Warms the recipe and web-search caches for every item of a freshly
+    generated plan, so "View Details" opens without waiting on the network.
+    Translations are left to the plan view, which needs them right away. Work runs on a shared worker pool in the gateway's background
+    lane; each user has at most one job (a newer plan cancels the older one)
+    and at most `max_items_per_user` items queued.
+    """
+    def __init__(self, max_workers: int = 4, max_items_per_user: int = 5):
+        self.max_items_per_user = max_items_per_user
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _plan_key(plan_data: dict):
+        return tuple(item.get('meal_name') for item in plan_data.get("plan", []))
+
+    def prefetch_plan(self, user_id: str, plan_data: dict) -> bool:
+        """
+        Queues prefetching for `plan_data` and returns immediately. Returns False
+        if the same plan is already being prefetched for this user.
+        """
+        key = self._plan_key(plan_data)
+        with self._lock:
+            job = self._jobs.get(user_id)
+            if job and job.key == key:
+                return False
+            if job:
+                job.cancel()
+            job = self._jobs[user_id] = _PrefetchJob(key)
+            for item in plan_data.get("plan", [])[:self.max_items_per_user]:
+                job.futures.append(self._executor.submit(self._run, job, item))
+        # Registered outside the lock: a callback on an already-finished future runs immediately.
+        for future in job.futures:
+            future.add_done_callback(lambda _, user_id=user_id, job=job: self._forget_if_done(user_id, job))
+        return True
+
+    def _forget_if_done(self, user_id: str, job: _PrefetchJob):
+        # Each Streamlit session has its own user_id, so finished jobs must not pile up here.
+        if not all(future.done() for future in job.futures):
+            return
+        with self._lock:
+            if self._jobs.get(user_id) is job:
+                del self._jobs[user_id]
+
+    def cancel(self, user_id: str):
+        with self._lock:
+            job = self._jobs.pop(user_id, None)
+        if job:
+            job.cancel()
+
+    def _run(self, job: _PrefetchJob, item: dict):
+        # Context variables don't follow work into pool threads, so set the lane here.
+        with priority_lane(Priority.BACKGROUND):
+            try:
+                self._warm_item(job, item)
+            except Exception as e:
+                logging.warning(f"Prefetch failed for '{item.get('meal_name')}': {e}")
+
+    def _warm_item(self, job: _PrefetchJob, item: dict):
+        meal_name = item.get('meal_name')
+        if not meal_name:
+            return
+        steps = [
+            lambda: db_instance.get_recipe(meal_name),
+            lambda: search_recipe_web(meal_name),
+        ]
+        for step in steps:
+            if job.cancelled.is_set():
+                return
+            step()
+
+
+# Create a single, shared prefetcher for the whole process.
+prefetcher = PlanPrefetcher(
+    max_workers=int(os.getenv("PREFETCH_MAX_WORKERS", 4)),
+    max_items_per_user=int(os.getenv("PREFETCH_MAX_ITEMS_PER_USER", 5)),
+)
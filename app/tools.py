@@ -11,7 +11,9 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_mongodb import MongoDBAtlasVectorSearch
 from langchain_community.embeddings import HuggingFaceBgeEmbeddings
 
+from cache import TTLCache
 from database import db_instance
+from gateway import gateway, Priority, GatewayError, is_retryable, current_priority
 
 # --- Pydantic Schemas ---
 class MealItem(BaseModel):
@@ -26,7 +28,8 @@ class MealPlan(BaseModel):
 
 # --- Initialize Tools and Chains ---
 try:
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest", temperature=0.5)
+    # Retries are owned by the gateway, so the client makes a single attempt.
+    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest", temperature=0.5, max_retries=1)
     tavily_tool = TavilySearchResults(max_results=3)
     embeddings = HuggingFaceBgeEmbeddings(
         model_name="BAAI/bge-base-en-v1.5",
@@ -41,6 +44,15 @@ except Exception as e:
     logging.error(f"Failed to initialize tools/chains. Check API keys and DB connection. Error: {e}")
     llm = None
 
+# --- Shared Caches (warmed in the background by prefetch.py) ---
+translation_cache = TTLCache(maxsize=4096, ttl=24 * 3600)
+web_search_cache = TTLCache(maxsize=1024, ttl=6 * 3600)
+# How long an interactive caller waits for a background prefetch of the same key before making the call itself.
+INTERACTIVE_CACHE_WAIT = 2.0
+
+def _cache_wait_timeout():
+    return None if current_priority() == Priority.BACKGROUND else INTERACTIVE_CACHE_WAIT
+
 # --- NEW: Multi-language Translation Tool ---
 @tool
 def translate_text(text_to_translate: str, target_language: str) -> str:
@@ -53,7 +65,7 @@ def translate_text(text_to_translate: str, target_language: str) -> str:
     if not llm:
         return f"(Translation unavailable) {text_to_translate}"
 
-    try:
+    def _translate():
         prompt = PromptTemplate.from_template(
             "You are a professional translator. Translate the following text into {language}. "
             "Preserve the original formatting (like markdown for lists or bold text) and tone as much as possible.\n\n"
@@ -61,11 +73,18 @@ def translate_text(text_to_translate: str, target_language: str) -> str:
             "TRANSLATED TEXT:"
         )
         chain = prompt | llm
-        translated_text = chain.invoke({
+        return gateway.call("gemini", chain.invoke, {
             "text": text_to_translate,
             "language": target_language
         }).content
-        return translated_text
+
+    try:
+        # UI strings and plan text repeat across reruns and users, so translations are shared.
+        return translation_cache.get_or_compute(
+            (text_to_translate, target_language.lower()),
+            _translate,
+            wait_timeout=_cache_wait_timeout()
+        )
     except Exception as e:
         logging.error(f"Translation failed: {e}")
         return f"(Translation failed) {text_to_translate}"
@@ -123,7 +142,7 @@ def create_meal_plan(user_request: str, profile_summary: str, allergies: str, di
         )
         chain = prompt | llm | parser
         
-        result = chain.invoke({
+        result = gateway.call("gemini", chain.invoke, {
             "request": user_request,
             "profile_summary": profile_summary,
             "meal_options": meal_options_text
@@ -132,9 +151,48 @@ def create_meal_plan(user_request: str, profile_summary: str, allergies: str, di
         
     except Exception as e:
         logging.error(f"Error in create_meal_plan tool: {e}")
+        # Throttling or an outage is not the user's fault, so don't ask them to rephrase.
+        if isinstance(e, GatewayError) or is_retryable(e):
+            return json.dumps({"error": "Lots of people are planning meals right now! Please try again in a minute."})
         return json.dumps({"error": "I had trouble creating your plan. Please try asking in a different way."})
 
-# --- TOOL 2: SMART, COMBINED RECIPE DETAILS GETTER (No changes needed) ---
+def search_recipe_web(item_name: str) -> dict:
+    """
+    Searches the web for a YouTube recipe video and a short summary of a dish.
+    Successful lookups are cached per dish so repeat views skip Tavily.
+    """
+    def _search():
+        yt_link = "Not found"
+        web_summary = ""
+        try:
+            # The raw API call raises HTTPError on 429/5xx, so the gateway can retry and
+            # trip its breaker; TavilySearchResults.invoke would hide it in a string.
+            search_results = gateway.call(
+                "tavily",
+                tavily_tool.api_wrapper.raw_results,
+                f"What is the best YouTube video recipe for {item_name}? Also provide a brief summary of the dish.",
+                max_results=tavily_tool.max_results,
+            ).get("results", [])
+            for res in search_results:
+                if "youtube.com" in res.get('url', '') and yt_link == "Not found":
+                    yt_link = res['url']
+                if not web_summary:
+                    web_summary = res.get('content', '')
+
+        except Exception as e:
+            logging.error(f"Tavily search failed for '{item_name}': {e}")
+            yt_link = "Search failed"
+            web_summary = "Could not search online for more details."
+        return {"youtube_link": yt_link, "summary": web_summary}
+
+    return web_search_cache.get_or_compute(
+        item_name.strip().lower(),
+        _search,
+        should_cache=lambda result: result["youtube_link"] != "Search failed",
+        wait_timeout=_cache_wait_timeout()
+    )
+
+# --- TOOL 2: SMART, COMBINED RECIPE DETAILS GETTER ---
 @tool
 def get_recipe_details(item_name: str) -> str:
     """
@@ -142,27 +200,10 @@ def get_recipe_details(item_name: str) -> str:
     database, then ALWAYS searches the web for a YouTube video link. Use this tool whenever a
     user asks for details, instructions, or how to make a specific item like 'dhokla'.
     """
-    db_details = db_instance.recipes_collection.find_one(
-        {"item_name": {"$regex": f"^{item_name}$", "$options": "i"}},
-        {"_id": 0}
-    )
+    db_details = db_instance.get_recipe(item_name)
     
-    yt_link = "Not found"
-    web_summary = ""
-    try:
-        search_results = tavily_tool.invoke({
-            "query": f"What is the best YouTube video recipe for {item_name}? Also provide a brief summary of the dish."
-        })
-        for res in search_results:
-            if "youtube.com" in res.get('url', '') and yt_link == "Not found":
-                yt_link = res['url']
-            if not web_summary:
-                web_summary = res.get('content', '')
-
-    except Exception as e:
-        logging.error(f"Tavily search failed for '{item_name}': {e}")
-        yt_link = "Search failed"
-        web_summary = "Could not search online for more details."
+    web = search_recipe_web(item_name)
+    yt_link, web_summary = web["youtube_link"], web["summary"]
         
     if not db_details:
         return json.dumps({
@@ -2,6 +2,9 @@ class UserProfile:
     """
     A class to store and manage a user's profile data and health metrics.
     """
+    # Users whose calorie targets fall in the same band share a precomputed plan.
+    CALORIE_BAND_KCAL = 250
+
     def __init__(self):
         # --- MODIFIED: Added diet_preference and language ---
         self.age, self.gender, self.weight_kg, self.height_cm, self.activity_level, self.goal, self.region = [None] * 7
@@ -10,11 +13,30 @@ class UserProfile:
         self.allergies = []
         self.bmi, self.bmr, self.daily_calories = [None] * 3
 
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Builds a profile from a stored document, e.g. the result of Database.get_user_profile."""
+        profile = cls()
+        for key, value in data.items():
+            if key != '_id': setattr(profile, key, value)
+        if not profile.language:
+            profile.language = "English"
+        profile.calculate_metrics()
+        return profile
+
     def is_complete(self):
         """Checks if all essential profile information has been gathered."""
         # --- MODIFIED: Added diet_preference to the check ---
         return all([self.age, self.gender, self.weight_kg, self.height_cm, self.activity_level, self.goal, self.region, self.diet_preference])
 
+    def calorie_band(self) -> int:
+        return int(round(self.daily_calories / self.CALORIE_BAND_KCAL) * self.CALORIE_BAND_KCAL)
+
+    def plan_group_key(self) -> str:
+        """A key shared by every user who would be given the same generated daily plan (see batch.py)."""
+        allergies = ",".join(sorted(a.lower() for a in self.allergies or [])) or "none"
+        return f"{self.diet_preference.lower()}|{allergies}|{self.region.lower()}|{self.calorie_band()}"
+
     def calculate_metrics(self):
         """Calculates BMI, BMR, and Daily Calorie needs based on the profile."""
         if not self.is_complete(): return
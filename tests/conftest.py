@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app modules import each other by bare name (they are run from app/), so do the same here.
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
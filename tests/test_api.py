@@ -0,0 +1,89 @@
+import json
+import threading
+
+from fastapi.testclient import TestClient
+
+from api import Backend, create_app
+from fakes import FakeDatabase, FakePlanner, FakeProvider, FakeTranslator, SAMPLE_PROFILE
+
+
+def make_client(monkeypatch, planner=None, db=None, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    backend = Backend(
+        planner or FakePlanner(FakeProvider()),
+        db if db is not None else FakeDatabase(),
+        FakeTranslator(FakeProvider()),
+    )
+    return TestClient(create_app(lambda: backend))
+
+
+def stream_events(client, user_id, request):
+    with client.stream("POST", "/chat/stream", json={"user_id": user_id, "request": request}) as response:
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_chat_for_unknown_user_is_404(monkeypatch):
+    with make_client(monkeypatch) as client:
+        response = client.post("/chat", json={"user_id": "nobody", "request": "hi"})
+    assert response.status_code == 404
+
+
+def test_chat_for_incomplete_profile_is_409(monkeypatch):
+    db = FakeDatabase()
+    db.save_user_profile("u1", {"age": 30, "language": "English"})
+    with make_client(monkeypatch, db=db) as client:
+        response = client.post("/chat", json={"user_id": "u1", "request": "hi"})
+    assert response.status_code == 409
+
+
+def test_full_pool_returns_503_with_retry_after(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    class BlockingPlanner:
+        def get_response(self, user_request, user_profile):
+            started.set()
+            release.wait(2.0)
+            return {"type": "message", "data": "done"}
+
+    db = FakeDatabase(default_profile=SAMPLE_PROFILE)
+    with make_client(monkeypatch, planner=BlockingPlanner(), db=db,
+                     API_MAX_WORKERS=1, API_MAX_QUEUE=0, API_QUEUE_TIMEOUT=0.05) as client:
+        first = threading.Thread(target=client.post, args=("/chat",), kwargs={"json": {"user_id": "u1", "request": "hi"}})
+        first.start()
+        assert started.wait(2.0)
+        try:
+            response = client.post("/chat", json={"user_id": "u2", "request": "hi"})
+        finally:
+            release.set()
+            first.join()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_stream_sends_response_before_translations(monkeypatch):
+    db = FakeDatabase(default_profile=SAMPLE_PROFILE)  # a Hindi speaker
+    with make_client(monkeypatch, db=db) as client:
+        events = stream_events(client, "u1", "make me a plan")
+
+    names = [event["event"] for event in events]
+    assert names[:2] == ["accepted", "response"]
+    assert names[-1] == "done"
+    translations = {event["path"]: event["text"] for event in events if event["event"] == "translation"}
+    assert set(translations) == {"greeting", "summary", "plan.0.justification", "plan.1.justification", "plan.2.justification"}
+    assert all(text.startswith("[Hindi] ") for text in translations.values())
+
+
+def test_stream_reports_unexpected_errors_as_events(monkeypatch):
+    class BrokenPlanner:
+        def get_response(self, user_request, user_profile):
+            raise ValueError("model returned garbage")
+
+    db = FakeDatabase(default_profile=SAMPLE_PROFILE)
+    with make_client(monkeypatch, planner=BrokenPlanner(), db=db) as client:
+        events = stream_events(client, "u1", "make me a plan")
+
+    assert [event["event"] for event in events] == ["accepted", "error"]
+    assert "model returned garbage" in events[1]["detail"]
@@ -0,0 +1,93 @@
+import pytest
+
+from batch import BatchPlanRunner, is_daily_plan_request
+from fakes import SAMPLE_PROFILE
+from user_profile import UserProfile
+
+
+class FakePlanStore:
+    """The slice of database.Database the batch runner uses."""
+    def __init__(self, profiles, fresh_groups=()):
+        self.profiles = profiles
+        self.plans = {key: {"summary": "old"} for key in fresh_groups}
+
+    def iter_complete_profiles(self, active_since=None):
+        return iter(self.profiles)
+
+    def get_precomputed_plan(self, group_key):
+        return self.plans.get(group_key)
+
+    def save_precomputed_plan(self, group_key, plan, ttl):
+        self.plans[group_key] = plan
+
+
+def profile(**overrides):
+    return {**SAMPLE_PROFILE, **overrides}
+
+
+def test_matching_profiles_share_one_plan():
+    store = FakePlanStore([
+        profile(_id="a", allergies=["Peanuts", "milk"]),
+        profile(_id="b", allergies=["MILK", "peanuts"], weight_kg=62.5),
+        profile(_id="c", allergies=["milk", "peanuts"], language="English"),
+        profile(_id="d", diet_preference="Non-Vegetarian"),
+    ])
+    generated = []
+    report = BatchPlanRunner(store, generate_plan=lambda p: generated.append(p) or {"summary": "new"}).run()
+
+    assert report["groups"] == 2 and report["generated"] == 2 and len(generated) == 2
+    assert report["dedup_ratio"] == 2.0
+    assert len(store.plans) == 2
+
+
+def test_unusable_profiles_are_skipped():
+    store = FakePlanStore([
+        profile(_id="ok"),
+        {"_id": "incomplete", "age": 30},
+        profile(_id="bad-height", height_cm="165"),
+        profile(_id="no-allergies", allergies=None),
+    ])
+    report = BatchPlanRunner(store, generate_plan=lambda p: {"summary": "new"}).run()
+
+    assert report["profiles"] == 4 and report["skipped"] == 2
+    assert report["groups"] == 1  # a missing allergy list groups with an empty one
+    assert report["dedup_ratio"] == 2.0
+
+
+@pytest.mark.parametrize("force, generated, reused", [(False, 0, 1), (True, 1, 0)])
+def test_fresh_plans_are_reused_unless_forced(force, generated, reused):
+    fresh_key = UserProfile.from_dict(SAMPLE_PROFILE).plan_group_key()
+    store = FakePlanStore([profile(_id="a")], fresh_groups=[fresh_key])
+    report = BatchPlanRunner(store, generate_plan=lambda p: {"summary": "new"}, force=force).run()
+
+    assert (report["generated"], report["reused"]) == (generated, reused)
+    assert store.plans[fresh_key]["summary"] == ("new" if force else "old")
+
+
+def test_failed_groups_are_counted():
+    def generate(p):
+        if p.diet_preference == "Vegan":
+            raise RuntimeError("model refused")
+        return {"summary": "new"}
+
+    store = FakePlanStore([profile(_id="a"), profile(_id="b", diet_preference="Vegan")])
+    report = BatchPlanRunner(store, generate_plan=generate).run()
+
+    assert (report["generated"], report["failed"]) == (1, 1)
+
+
+@pytest.mark.parametrize("text", [
+    "plan", "Make me a plan", "please give me today's plan", "today’s plan",
+    "What's my plan?", "what is the meal plan for today", "What’s today’s diet plan?",
+    "show me my food plan for the day please",
+])
+def test_generic_plan_requests_are_recognised(text):
+    assert is_daily_plan_request(text)
+
+
+@pytest.mark.parametrize("text", [
+    "What's the plan?", "make me a high-protein plan", "plan for 1500 kcal",
+    "what's the plan for tomorrow", "I don't like the plan",
+])
+def test_specific_or_conversational_requests_are_not(text):
+    assert not is_daily_plan_request(text)
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from cache import TTLCache
+
+
+def test_concurrent_misses_compute_once():
+    cache = TTLCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    threads = [threading.Thread(target=cache.get_or_compute, args=("key", compute)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert cache.get("key") == "value"
+
+
+def test_bounded_waiter_does_not_block_behind_slow_computation():
+    cache = TTLCache()
+    slow_started = threading.Event()
+
+    def slow():
+        slow_started.set()
+        time.sleep(1.0)
+        return "slow"
+
+    background = threading.Thread(target=cache.get_or_compute, args=("key", slow))
+    background.start()
+    slow_started.wait()
+
+    started = time.monotonic()
+    assert cache.get_or_compute("key", lambda: "fast", wait_timeout=0.05) == "fast"
+    assert time.monotonic() - started < 0.5
+    background.join()
+
+
+def test_entries_expire():
+    now = [0.0]
+    cache = TTLCache(ttl=10, clock=lambda: now[0])
+    cache.set("key", "value")
+    now[0] = 11
+    assert cache.get("key") is None
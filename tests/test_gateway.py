@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from fakes import FakeProvider, FakeProviderError
+from gateway import ClientGateway, CircuitBreaker, CircuitOpenError, GatewayBusyError, Priority
+
+
+def make_gateway(**overrides):
+    gateway = ClientGateway()
+    gateway._sleep = lambda delay: None
+    settings = dict(rate=1000, burst=100, max_concurrency=2, max_retries=3,
+                    max_wait=1.0, failure_threshold=3, reset_timeout=0.1)
+    settings.update(overrides)
+    gateway.register("fake", **settings)
+    return gateway
+
+
+def test_retries_throttled_calls_then_succeeds():
+    gateway = make_gateway()
+    provider = FakeProvider(response="ok")
+    provider.fail_next(2, 429)
+
+    assert gateway.call("fake", provider) == "ok"
+    assert provider.calls == 3
+    assert gateway.stats("fake")["retries"] == 2
+
+
+def test_non_retryable_errors_are_raised_without_retry():
+    gateway = make_gateway()
+    provider = FakeProvider()
+    provider.fail_next(1, 400)
+
+    with pytest.raises(FakeProviderError):
+        gateway.call("fake", provider)
+    assert provider.calls == 1
+    assert gateway.stats("fake")["circuit"] == CircuitBreaker.CLOSED
+
+
+def test_circuit_opens_and_fails_fast():
+    gateway = make_gateway(max_retries=5)
+    provider = FakeProvider(error_rate=1.0, error_status=503)
+
+    with pytest.raises(FakeProviderError):
+        gateway.call("fake", provider)
+    assert provider.calls == 3  # stops retrying once the circuit opens
+
+    with pytest.raises(CircuitOpenError):
+        gateway.call("fake", provider)
+    assert provider.calls == 3
+
+
+def test_concurrency_is_capped():
+    gateway = make_gateway(max_concurrency=2)
+    provider = FakeProvider(latency=0.05)
+    threads = [threading.Thread(target=gateway.call, args=("fake", provider)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert provider.max_in_flight == 2
+
+
+def test_refused_half_open_trial_is_released():
+    # Regression: a trial call that could not get a concurrency slot used to leave
+    # the breaker claimed forever, so every later call failed with CircuitOpenError.
+    gateway = make_gateway(max_concurrency=1, max_retries=0, failure_threshold=1, max_wait=0.05)
+    failing = FakeProvider()
+    failing.fail_next(1, 429)
+    with pytest.raises(FakeProviderError):
+        gateway.call("fake", failing)
+    time.sleep(0.15)  # past reset_timeout: the breaker is half-open
+
+    provider = FakeProvider()
+    p = gateway._providers["fake"]
+    holder = threading.Thread(target=lambda: (p.semaphore.acquire(0, 1.0), time.sleep(0.2), p.semaphore.release()))
+    holder.start()
+    time.sleep(0.02)
+    with pytest.raises(GatewayBusyError):
+        gateway.call("fake", provider)
+    holder.join()
+
+    assert gateway.call("fake", FakeProvider(response="ok")) == "ok"
+    assert gateway.stats("fake")["circuit"] == CircuitBreaker.CLOSED
+
+
+def test_late_success_does_not_close_an_open_circuit():
+    gateway = make_gateway(max_concurrency=4, max_retries=0, failure_threshold=1, reset_timeout=30)
+    started, release = threading.Event(), threading.Event()
+    slow = FakeProvider(response=lambda: (started.set(), release.wait(1.0)) and "late")
+    caller = threading.Thread(target=gateway.call, args=("fake", slow))
+    caller.start()
+    started.wait(1.0)
+
+    failing = FakeProvider()
+    failing.fail_next(1, 503)
+    with pytest.raises(FakeProviderError):
+        gateway.call("fake", failing)
+    release.set()
+    caller.join()
+
+    # The slow call was admitted before the circuit opened; its success must not close it.
+    assert gateway.stats("fake")["circuit"] == CircuitBreaker.OPEN
+
+
+def test_client_errors_do_not_reset_the_failure_streak():
+    gateway = make_gateway(max_retries=0, failure_threshold=2)
+    provider = FakeProvider()
+    provider.fail_next(1, 503)
+    provider.fail_next(1, 400)
+    provider.fail_next(1, 503)
+    for _ in range(3):
+        with pytest.raises(FakeProviderError):
+            gateway.call("fake", provider)
+
+    assert gateway.stats("fake")["circuit"] == CircuitBreaker.OPEN
+
+
+class _HTTPError(Exception):
+    """Shaped like requests.HTTPError, which Tavily's raw API raises: the status is on `.response`."""
+    def __init__(self, status_code):
+        super().__init__(f"{status_code} Client Error")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+def test_errors_carrying_a_response_status_are_retried():
+    gateway = make_gateway()
+    attempts = []
+
+    def search(query, max_results):
+        attempts.append(query)
+        if len(attempts) < 3:
+            raise _HTTPError(429)
+        return {"results": []}
+
+    assert gateway.call("fake", search, "poha", max_results=3) == {"results": []}
+    assert len(attempts) == 3
+
+
+@pytest.mark.parametrize("burst", [1, 1.25])
+def test_background_calls_fit_in_a_small_bucket(burst):
+    # GATEWAY_PROCESSES can shrink a provider's burst to a single token.
+    gateway = make_gateway(burst=burst, max_wait=0.2)
+    assert gateway.call("fake", FakeProvider(response="ok"), priority=Priority.BACKGROUND) == "ok"
@@ -0,0 +1,81 @@
+import sys
+import types
+import threading
+import importlib
+
+import pytest
+
+
+class StubDatabase:
+    def __init__(self):
+        self.lookups = []
+        self.release = threading.Event()
+
+    def get_recipe(self, name):
+        self.lookups.append(name)
+        self.release.wait(1.0)
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    # prefetch imports the live database and LangChain tools; stand in for both.
+    db = StubDatabase()
+    searches = []
+    monkeypatch.setitem(sys.modules, "database", types.SimpleNamespace(db_instance=db))
+    monkeypatch.setitem(sys.modules, "tools", types.SimpleNamespace(search_recipe_web=searches.append))
+    monkeypatch.delitem(sys.modules, "prefetch", raising=False)
+    prefetch = importlib.import_module("prefetch")
+    yield prefetch, db, searches
+    db.release.set()
+    sys.modules.pop("prefetch", None)
+
+
+def make_plan(*names):
+    return {"plan": [{"meal_name": name, "justification": f"Why {name}"} for name in names]}
+
+
+def wait_for_done(job):
+    for future in job.futures:
+        try:
+            future.result(timeout=2.0)
+        except Exception:
+            pass  # cancelled
+
+
+def test_same_plan_is_queued_once(stubs):
+    prefetch, db, _ = stubs
+    prefetcher = prefetch.PlanPrefetcher(max_workers=2)
+
+    assert prefetcher.prefetch_plan("u1", make_plan("Poha", "Dal"))
+    assert not prefetcher.prefetch_plan("u1", make_plan("Poha", "Dal"))
+    assert len(prefetcher._jobs["u1"].futures) == 2
+
+
+def test_new_plan_cancels_the_previous_job(stubs):
+    prefetch, db, searches = stubs
+    prefetcher = prefetch.PlanPrefetcher(max_workers=1)
+
+    prefetcher.prefetch_plan("u1", make_plan("Poha", "Dal"))
+    old_job = prefetcher._jobs["u1"]
+    prefetcher.prefetch_plan("u1", make_plan("Upma"))
+    new_job = prefetcher._jobs["u1"]
+    db.release.set()
+    wait_for_done(old_job)
+    wait_for_done(new_job)
+
+    assert old_job.cancelled.is_set() and new_job is not old_job
+    assert "Dal" not in db.lookups  # queued behind the running item and cancelled
+    assert "Poha" not in searches  # its lookup finished after the cancel, so the search was skipped
+    assert searches == ["Upma"]
+
+
+def test_finished_jobs_are_forgotten(stubs):
+    prefetch, db, searches = stubs
+    prefetcher = prefetch.PlanPrefetcher(max_workers=2)
+    db.release.set()
+
+    prefetcher.prefetch_plan("u1", make_plan("Poha", "Dal"))
+    prefetcher._executor.shutdown(wait=True)  # done callbacks run on the workers before they exit
+
+    assert "u1" not in prefetcher._jobs
+    assert sorted(searches) == ["Dal", "Poha"]